@@ -5,8 +5,12 @@ from datetime import datetime
 import base64
 import io
 import csv
+import hashlib
 import json
 import os
+import re
+import unicodedata
+from difflib import SequenceMatcher
 import pyperclip  # For clipboard functionality
 
 # Page configuration
@@ -174,11 +178,43 @@ IMPORTANT STYLE GUIDELINES:
 6. Focus on program completion and content, not transformative outcomes
 """
 
+# Local ranking rules for multi-candidate generation
+# Phrases that break the SYSTEM_INSTRUCTION rules (unacceptable phrases and banned words)
+DISALLOWED_PATTERNS = [
+    r"\b(learned|learnt) how to\b",
+    r"\bgained skills\b",
+    r"\bis now able to\b",
+    r"\bhas transformed\b",
+    r"\bentrepreneur",
+]
+
+# Fixed sentences from the letter format in DEFAULT_PROMPT_TEMPLATE
+TEMPLATE_ANCHOR_PHRASES = [
+    "completed the Make Your Own Money Learning Journey",
+    "a series of WhatsApp modules presented by SA Youth",
+    "CoachMee",
+    "The 30 WhatsApp sessions covered",
+    "SA Youth wishes",
+]
+
+# The quoted letter format in DEFAULT_PROMPT_TEMPLATE, used as the length reference
+TEMPLATE_LETTER = re.search(r'^"(On .*?)"$', DEFAULT_PROMPT_TEMPLATE, flags=re.DOTALL | re.MULTILINE).group(1)
+
+MAX_CANDIDATES = 4
+
+# Similarity thresholds for near-duplicate participants in batch uploads
+NAME_SIMILARITY_THRESHOLD = 0.85
+ORGANIZATION_SIMILARITY_THRESHOLD = 0.8
+
 # Initialize session state variables
 if 'last_certificate_data' not in st.session_state:
     st.session_state.last_certificate_data = {
         'participant_data': None,
-        'certificate_text': None
+        'certificate_text': None,
+        'candidates': [],
+        'candidate_index': 0,
+        'prompt_template': None,
+        'system_instruction': None
     }
 
 if 'api_key_set' not in st.session_state:
@@ -187,15 +223,21 @@ if 'api_key_set' not in st.session_state:
 if 'template_name' not in st.session_state:
     st.session_state.template_name = "Default Template"
 
+if 'num_candidates' not in st.session_state:
+    st.session_state.num_candidates = 1
+
+if 'generated_results' not in st.session_state:
+    st.session_state.generated_results = []
+
 if 'prompt_template' not in st.session_state:
     st.session_state.prompt_template = DEFAULT_PROMPT_TEMPLATE
 
 if 'system_instruction' not in st.session_state:
     st.session_state.system_instruction = SYSTEM_INSTRUCTION
 
-# Function to generate certificate
-def generate_certificate(participant_data, prompt_template=None, system_instruction=None):
-    """Generate a personalized certificate using Google's Gemini model."""
+# Function to build the full prompt for a participant
+def build_prompt(participant_data, prompt_template=None, system_instruction=None):
+    """Fill the prompt template with participant data and prepend the system instruction."""
 
     if prompt_template is None:
         prompt_template = st.session_state.prompt_template
@@ -226,6 +268,26 @@ def generate_certificate(participant_data, prompt_template=None, system_instruct
         strength_reference="{strength_reference}"  # Will be filled by the model
     )
 
+    # Create a properly formatted prompt that includes system instruction
+    return f"{system_instruction}\n\n{formatted_prompt}"
+
+# Function to generate certificate
+def generate_certificate(participant_data, prompt_template=None, system_instruction=None):
+    """Generate a personalized certificate using Google's Gemini model."""
+    return generate_certificate_candidates(participant_data, 1, prompt_template, system_instruction)[0]
+
+# Function to generate one or more certificate candidates in a single call
+def generate_certificate_candidates(participant_data, num_candidates=1, prompt_template=None, system_instruction=None):
+    """Generate certificate candidates in a single Gemini call, best ranked first."""
+
+    if prompt_template is None:
+        prompt_template = st.session_state.prompt_template
+
+    if system_instruction is None:
+        system_instruction = st.session_state.system_instruction
+
+    full_prompt = build_prompt(participant_data, prompt_template, system_instruction)
+
     try:
         # Set up the model
         model = genai.GenerativeModel("gemini-2.0-flash-001")
@@ -236,25 +298,219 @@ def generate_certificate(participant_data, prompt_template=None, system_instruct
             "top_p": 0.95,
             "top_k": 40,
             "max_output_tokens": 2024,
+            "candidate_count": num_candidates,
         }
 
-        # Create a properly formatted prompt that includes system instruction
-        full_prompt = f"{system_instruction}\n\n{formatted_prompt}"
-
         # Generate content
         response = model.generate_content(
             full_prompt,
             generation_config=generation_config
         )
 
-        # Check if we have any candidates
-        if not response.candidates or not response.candidates[0].content or not response.candidates[0].content.parts:
-            return "Error: No response generated. The model may have rejected the content. Try adjusting your prompt."
+        # Keep only candidates that finished normally and contain text;
+        # letters cut off by the token limit or a safety stop shouldn't be shown
+        candidates = [
+            candidate.content.parts[0].text
+            for candidate in response.candidates
+            if candidate.finish_reason == genai.protos.Candidate.FinishReason.STOP
+            and candidate.content and candidate.content.parts
+        ]
 
-        # Directly access text to avoid the empty candidates issue
-        return response.candidates[0].content.parts[0].text
+        if not candidates:
+            return ["Error: No response generated. The model may have rejected the content. Try adjusting your prompt."]
+
+        return rank_certificates(candidates, participant_data, prompt_template, system_instruction)
     except Exception as e:
-        return f"Error generating certificate: {str(e)}"
+        return [f"Error generating certificate: {str(e)}"]
+
+# Function to work out the expected letter length for a participant
+def target_word_count(participant_data):
+    """Word count of the template letter with this participant's details filled in."""
+    letter = TEMPLATE_LETTER
+    for placeholder, field in [('{name}', 'name'), ('{completion_date}', 'completion_date'),
+                               ('{organization}', 'organization'), ('{strengths_expanded}', 'strengths'),
+                               ('{strength_reference}', 'strengths')]:
+        letter = letter.replace(placeholder, participant_data.get(field) or placeholder)
+    return len(letter.split())
+
+# Function to score a certificate against the rules and template
+def score_certificate(certificate_text, participant_data, prompt_template=DEFAULT_PROMPT_TEMPLATE,
+                      system_instruction=SYSTEM_INSTRUCTION):
+    """Score a certificate locally; higher means closer to the rules and template."""
+    score = 0.0
+    lowered = certificate_text.lower()
+
+    # The rule and structure terms are written for the default instructions and template.
+    # When either has been customised in the Prompt Engineering tab, its terms are turned off
+    # rather than guessed, and ranking falls back to placeholders and participant details.
+
+    # Rule compliance: heavy penalty for each phrase the system instruction forbids
+    if system_instruction == SYSTEM_INSTRUCTION:
+        for pattern in DISALLOWED_PATTERNS:
+            score -= 10 * len(re.findall(pattern, certificate_text, flags=re.IGNORECASE))
+
+    # Unfilled placeholders like {strengths} or [specific strength] mean the model didn't finish the letter
+    score -= 5 * len(re.findall(r"\{[a-z_]+\}|\[[^\]]+\]", certificate_text))
+
+    # The participant's own details should appear in the letter
+    for field in ['name', 'completion_date', 'organization']:
+        value = participant_data.get(field, '')
+        if value and value.lower() in lowered:
+            score += 2
+
+    if prompt_template == DEFAULT_PROMPT_TEMPLATE:
+        # Template structure: reward the fixed sentences of the letter format
+        for phrase in TEMPLATE_ANCHOR_PHRASES:
+            if phrase.lower() in lowered:
+                score += 2
+
+        # Length: lose a point for every 10% away from the template length
+        target = target_word_count(participant_data)
+        word_count = len(certificate_text.split())
+        score -= 10 * abs(word_count - target) / target
+
+    return score
+
+# Function to rank certificate candidates
+def rank_certificates(candidates, participant_data, prompt_template=DEFAULT_PROMPT_TEMPLATE,
+                      system_instruction=SYSTEM_INSTRUCTION):
+    """Return candidates sorted from best to worst score."""
+    return sorted(candidates,
+                  key=lambda text: score_certificate(text, participant_data, prompt_template, system_instruction),
+                  reverse=True)
+
+# Function to normalize free text for matching
+def normalize_text(value):
+    """Lowercase, strip accents and punctuation, and collapse whitespace."""
+    value = unicodedata.normalize('NFKD', str(value or ''))
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    value = re.sub(r"[^a-z0-9 ]", " ", value.lower())
+    return " ".join(value.split())
+
+# Function to normalize completion dates written in different formats
+def normalize_date(value):
+    """Return the date in ISO format if it can be parsed, else the normalized text."""
+    value = str(value or '').strip()
+    for date_format in ["%d %B %Y", "%d %b %Y", "%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%B %d, %Y"]:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return normalize_text(value)
+
+# Function to build the exact-match key for a participant
+def blocking_key(participant):
+    """Normalized (name, organization, completion_date, gender) key for exact duplicate detection."""
+    return (
+        normalize_text(participant.get('name')),
+        normalize_text(participant.get('organization')),
+        normalize_date(participant.get('completion_date')),
+        normalize_text(participant.get('gender'))
+    )
+
+# Function to prepare a participant for duplicate matching
+def match_record(participant):
+    """Normalize a participant once, so pairwise comparisons don't repeat the work."""
+    key = blocking_key(participant)
+    name, organization, completion_date, gender = key
+    sorted_name = " ".join(sorted(name.split()))
+    return {
+        'key': key,
+        'name': name,
+        'sorted_name': sorted_name,
+        'organization': organization,
+        # Matchers against this record's own values, reused for every comparison
+        'name_matcher': SequenceMatcher(None, b=name),
+        'sorted_name_matcher': SequenceMatcher(None, b=sorted_name),
+        'organization_matcher': SequenceMatcher(None, b=organization),
+        # Near matches are only looked for within the same completion date and gender
+        'block': (completion_date, gender)
+    }
+
+# Function to check that a similarity ratio can reach a threshold
+def similar_enough(matcher, value, threshold):
+    """Return the ratio of value against the matcher's sequence if it reaches the threshold, else 0.
+
+    The length bound and quick_ratio are checked first, so most pairs never reach the full ratio().
+    """
+    other_value = matcher.b
+    if 2 * min(len(value), len(other_value)) < threshold * (len(value) + len(other_value)):
+        return 0.0
+    matcher.set_seq1(value)
+    if matcher.quick_ratio() < threshold:
+        return 0.0
+    ratio = matcher.ratio()
+    return ratio if ratio >= threshold else 0.0
+
+# Function to compare two participants from the same block
+def participant_similarity(record, other):
+    """Return the name similarity if both name and organization are close enough, else 0."""
+
+    # Compare names regardless of word order (e.g. "Vilakazi Thando")
+    name_score = max(
+        similar_enough(record['name_matcher'], other['name'], NAME_SIMILARITY_THRESHOLD),
+        similar_enough(record['sorted_name_matcher'], other['sorted_name'], NAME_SIMILARITY_THRESHOLD)
+    )
+    if not name_score:
+        return 0.0
+
+    # A missing organization on either side shouldn't block the match
+    if record['organization'] and other['organization']:
+        if not similar_enough(record['organization_matcher'], other['organization'], ORGANIZATION_SIMILARITY_THRESHOLD):
+            return 0.0
+
+    return name_score
+
+# Function to find duplicates within an upload and against previous results
+@st.cache_data(max_entries=10, show_spinner=False)
+def find_duplicates(participants, previous_results):
+    """Map each duplicate row index to the row or previous result it matches.
+
+    Returns a dict of row index -> {'source': 'batch' or 'previous', 'index', 'match', 'similarity'}.
+    Rows that are not in the dict are unique and need to be generated. Rows whose name
+    normalizes to nothing (blank or non-Latin only) are never matched.
+    """
+    previous_lookup = {}
+    blocks = {}
+    for j, result in enumerate(previous_results):
+        record = match_record(result)
+        if not record['name']:
+            continue
+        previous_lookup.setdefault(record['key'], j)
+        blocks.setdefault(record['block'], []).append(('previous', j, record))
+
+    duplicates = {}
+    unique_keys = {}
+    for i, participant in enumerate(participants):
+        record = match_record(participant)
+        if not record['name']:
+            continue
+
+        # Exact matches on the normalized key
+        if record['key'] in previous_lookup:
+            duplicates[i] = {'source': 'previous', 'index': previous_lookup[record['key']], 'match': 'exact', 'similarity': 1.0}
+            continue
+        if record['key'] in unique_keys:
+            duplicates[i] = {'source': 'batch', 'index': unique_keys[record['key']], 'match': 'exact', 'similarity': 1.0}
+            continue
+
+        # Near matches, compared only within the same block; an unknown gender can't be checked
+        block = blocks.setdefault(record['block'], [])
+        best = None
+        if record['block'][1]:
+            for source, j, other in block:
+                similarity = participant_similarity(record, other)
+                if similarity and (best is None or similarity > best['similarity']):
+                    best = {'source': source, 'index': j, 'match': 'near', 'similarity': similarity}
+
+        if best:
+            duplicates[i] = best
+
+        # Near matches are only linked on request, so exact copies of them should match them directly
+        unique_keys[record['key']] = i
+        block.append(('batch', i, record))
+
+    return duplicates
 
 # Sample data for demonstration
 def load_sample_data():
@@ -363,6 +619,13 @@ with tab1:
                     st.success("API key set successfully! You can now generate certificates.")
                 except Exception as e:
                     st.error(f"Error setting API key: {str(e)}")
+        
+        st.subheader("Generation Options")
+        st.session_state.num_candidates = st.number_input(
+            "Candidates per generation", min_value=1, max_value=MAX_CANDIDATES,
+            value=st.session_state.num_candidates,
+            help="Generate several letters in one call. The best one is shown and "
+                 "Regenerate cycles through the rest without another API call.")
     
     # Buttons for generating certificates
     col1, col2 = st.columns(2)
@@ -391,12 +654,17 @@ with tab1:
                     "goals": goals
                 }
                 
-                # Generate certificate
-                certificate_text = generate_certificate(participant_data)
+                # Generate certificate (best ranked candidate first when several are requested)
+                candidates = generate_certificate_candidates(participant_data, st.session_state.num_candidates)
+                certificate_text = candidates[0]
                 
                 # Save for regeneration
                 st.session_state.last_certificate_data['participant_data'] = participant_data
                 st.session_state.last_certificate_data['certificate_text'] = certificate_text
+                st.session_state.last_certificate_data['candidates'] = candidates
+                st.session_state.last_certificate_data['candidate_index'] = 0
+                st.session_state.last_certificate_data['prompt_template'] = st.session_state.prompt_template
+                st.session_state.last_certificate_data['system_instruction'] = st.session_state.system_instruction
                 
                 # Save form values to session state
                 st.session_state.name = name
@@ -408,6 +676,8 @@ with tab1:
                 
                 # Display certificate with better formatting and id for copy functionality
                 st.subheader("Generated Certificate")
+                if len(candidates) > 1:
+                    st.caption(f"Best of {len(candidates)} candidates. Regenerate shows the next one without another API call.")
                 # Replace newlines with <br> tags and wrap in div with id for copying
                 formatted_certificate = certificate_text.replace('\n', '<br>')
                 st.markdown(f'<div class="certificate-container" id="certificate-text">{formatted_certificate}</div>', unsafe_allow_html=True)
@@ -440,14 +710,34 @@ with tab1:
             st.error("No previous certificate data found")
         else:
             with st.spinner("Regenerating certificate..."):
-                # Generate a new certificate with the same data
-                certificate_text = generate_certificate(st.session_state.last_certificate_data['participant_data'])
+                last_data = st.session_state.last_certificate_data
+                candidates = last_data.get('candidates', [])
+                next_index = last_data.get('candidate_index', 0) + 1
+                
+                # Candidates built from a prompt that has since been edited are stale
+                prompt_unchanged = (last_data.get('prompt_template') == st.session_state.prompt_template and
+                                    last_data.get('system_instruction') == st.session_state.system_instruction)
+                
+                if prompt_unchanged and next_index < len(candidates):
+                    # Show the next ranked candidate without another API call
+                    certificate_text = candidates[next_index]
+                    last_data['candidate_index'] = next_index
+                else:
+                    # Generate a new certificate with the same data and the current prompt
+                    candidates = generate_certificate_candidates(last_data['participant_data'], st.session_state.num_candidates)
+                    certificate_text = candidates[0]
+                    last_data['candidates'] = candidates
+                    last_data['candidate_index'] = 0
+                    last_data['prompt_template'] = st.session_state.prompt_template
+                    last_data['system_instruction'] = st.session_state.system_instruction
                 
                 # Update the stored certificate
-                st.session_state.last_certificate_data['certificate_text'] = certificate_text
+                last_data['certificate_text'] = certificate_text
                 
                 # Display regenerated certificate with better formatting
                 st.subheader("Regenerated Certificate")
+                if len(last_data['candidates']) > 1:
+                    st.caption(f"Candidate {last_data['candidate_index'] + 1} of {len(last_data['candidates'])} (ranked best first)")
                 # Replace newlines with <br> tags and wrap in div with id for copying
                 formatted_certificate = certificate_text.replace('\n', '<br>')
                 st.markdown(f'<div class="certificate-container" id="certificate-text">{formatted_certificate}</div>', unsafe_allow_html=True)
@@ -571,6 +861,54 @@ with tab3:
     # Upload CSV file
     uploaded_file = st.file_uploader("Choose a CSV file", type=["csv"])
     
+    # Optional results CSV from an earlier batch, so certificates we already have aren't generated again
+    previous_file = st.file_uploader("Previously generated results (optional)", type=["csv"],
+                                     help="Upload an all_certificates.csv from an earlier batch to skip participants who already have a certificate.")
+    previous_source = None
+    if previous_file is not None:
+        previous_source = f"previous:{hashlib.md5(previous_file.getvalue()).hexdigest()}"
+    
+    # Rows from a previous results file are only kept while that file is uploaded
+    st.session_state.generated_results = [
+        result for result in st.session_state.generated_results
+        if not result.get('source', '').startswith("previous:") or result.get('source', '') == previous_source
+    ]
+    
+    if previous_file is not None and not any(result.get('source', '') == previous_source for result in st.session_state.generated_results):
+        try:
+            previous_reader = csv.DictReader(io.StringIO(previous_file.getvalue().decode('utf-8')))
+            if not {'Name', 'Gender', 'Organization', 'Completion Date', 'Certificate'}.issubset(previous_reader.fieldnames or []):
+                st.error("Previous results CSV must have Name, Gender, Organization, Completion Date and Certificate columns")
+            else:
+                known_keys = set()
+                for row in previous_reader:
+                    # Failed rows are recorded as error text; those participants still need a certificate
+                    if not row['Certificate'] or row['Certificate'].startswith("Error"):
+                        continue
+                    result = {
+                        'name': row['Name'],
+                        'gender': row['Gender'],
+                        'organization': row['Organization'],
+                        'completion_date': row['Completion Date'],
+                        'certificate': row['Certificate'],
+                        'source': previous_source
+                    }
+                    if blocking_key(result) not in known_keys:
+                        st.session_state.generated_results.append(result)
+                        known_keys.add(blocking_key(result))
+        except Exception as e:
+            st.error(f"Error loading previous results: {str(e)}")
+    
+    # Certificates generated in this session are remembered for later uploads until cleared
+    generated_count = sum(1 for result in st.session_state.generated_results if result.get('source', '').startswith("upload:"))
+    if generated_count:
+        st.caption(f"{generated_count} certificates from earlier uploads in this session are checked for duplicates.")
+        if st.button("Forget Certificates From Earlier Uploads"):
+            st.session_state.generated_results = [
+                result for result in st.session_state.generated_results if not result.get('source', '').startswith("upload:")
+            ]
+            st.rerun()
+    
     # Process batch if file is uploaded
     if uploaded_file is not None and st.session_state.api_key_set:
         # Read CSV
@@ -591,29 +929,117 @@ with tab3:
                 for row in reader:
                     csv_data.append(row)
                 
+                # Snapshot the remembered certificates for this run. Certificates generated from this
+                # same upload on an earlier run (e.g. before a download button rerun) are left out,
+                # so the upload isn't reported as a duplicate of itself.
+                upload_source = f"upload:{hashlib.md5(uploaded_file.getvalue()).hexdigest()}"
+                previous_results = [
+                    result for result in st.session_state.generated_results if result.get('source', '') != upload_source
+                ]
+                duplicates = find_duplicates(csv_data, previous_results)
+                
                 # Set up progress tracking
                 total_rows = len(csv_data)
                 st.info(f"Found {total_rows} participants in the CSV file. Ready to generate certificates.")
                 
+                # Describe what each duplicate row matched, for the report and the results CSV
+                matched_to = {}
+                for i, duplicate in duplicates.items():
+                    if duplicate['source'] == 'batch':
+                        matched_name = csv_data[duplicate['index']].get('name', 'Unknown')
+                        matched_to[i] = f"Row {duplicate['index'] + 1} ({matched_name})"
+                    else:
+                        matched_name = previous_results[duplicate['index']]['name']
+                        matched_to[i] = f"Previous result ({matched_name})"
+                
+                link_exact = True
+                link_near = False
+                if duplicates:
+                    st.warning(f"{len(duplicates)} rows look like duplicates of participants in this upload or previously generated results.")
+                    
+                    # Duplicate report
+                    report_rows = []
+                    for i, duplicate in duplicates.items():
+                        report_rows.append({
+                            "Row": i + 1,
+                            "Name": csv_data[i].get('name', 'Unknown'),
+                            "Matched To": matched_to[i],
+                            "Match": duplicate['match'],
+                            "Similarity": round(duplicate['similarity'], 2)
+                        })
+                    duplicate_report = pd.DataFrame(report_rows)
+                    
+                    with st.expander("Duplicate Report", expanded=True):
+                        st.dataframe(duplicate_report, use_container_width=True, hide_index=True)
+                        st.download_button(
+                            label="📊 Download Duplicate Report",
+                            data=duplicate_report.to_csv(index=False),
+                            file_name="duplicate_report.csv",
+                            mime="text/csv",
+                        )
+                    
+                    link_exact = st.checkbox("Link exact duplicates to existing certificates", value=True,
+                                             help="Exact duplicate rows reuse the certificate of the row or previous result they match instead of calling the API again.")
+                    link_near = st.checkbox("Also link near duplicates", value=False,
+                                            help="Near duplicates may be different people with similar names. Only turn this on after checking the report; otherwise they are generated separately.")
+                
                 if st.button("Generate Batch Certificates"):
                     progress_bar = st.progress(0)
                     status_text = st.empty()
                     
+                    # Replace anything remembered from an earlier run of this upload with this run's results
+                    st.session_state.generated_results = list(previous_results)
+                    
                     # Process each row
                     all_certificates = []
                     errors = []
+                    row_certificates = {}
                     
                     for i, participant in enumerate(csv_data):
                         try:
-                            status_text.info(f"Generating certificate {i+1}/{total_rows} for {participant.get('name', 'Unknown')}...")
+                            duplicate = duplicates.get(i)
+                            if duplicate and not (link_exact if duplicate['match'] == 'exact' else link_near):
+                                duplicate = None
+                            duplicate_of = ""
                             
-                            # Generate certificate
-                            certificate = generate_certificate(participant)
+                            if duplicate and duplicate['source'] == 'previous':
+                                # Link to a certificate we already have
+                                status_text.info(f"Reusing previous certificate {i+1}/{total_rows} for {participant.get('name', 'Unknown')}...")
+                                certificate = previous_results[duplicate['index']]['certificate']
+                                row_certificates[i] = certificate
+                                duplicate_of = matched_to[i]
+                            elif duplicate and duplicate['index'] in row_certificates:
+                                # Link to the certificate generated for the matching row in this upload
+                                status_text.info(f"Reusing certificate {i+1}/{total_rows} for {participant.get('name', 'Unknown')}...")
+                                certificate = row_certificates[duplicate['index']]
+                                row_certificates[i] = certificate
+                                duplicate_of = matched_to[i]
+                            else:
+                                status_text.info(f"Generating certificate {i+1}/{total_rows} for {participant.get('name', 'Unknown')}...")
+                                
+                                # Generate certificate
+                                certificate = generate_certificate(participant)
+                                
+                                # Remember successful certificates for duplicates in this and later uploads
+                                if not certificate.startswith("Error"):
+                                    row_certificates[i] = certificate
+                                    st.session_state.generated_results.append({
+                                        'name': participant.get('name', 'Unknown'),
+                                        'gender': participant.get('gender', ''),
+                                        'organization': participant.get('organization', ''),
+                                        'completion_date': participant.get('completion_date', ''),
+                                        'certificate': certificate,
+                                        'source': upload_source
+                                    })
                             
                             # Store certificate
                             all_certificates.append({
                                 'name': participant.get('name', 'Unknown'),
-                                'certificate': certificate
+                                'gender': participant.get('gender', ''),
+                                'organization': participant.get('organization', ''),
+                                'completion_date': participant.get('completion_date', ''),
+                                'certificate': certificate,
+                                'duplicate_of': duplicate_of
                             })
                             
                             # Update progress
@@ -629,7 +1055,11 @@ with tab3:
                     for cert in all_certificates:
                         result_rows.append({
                             "Name": cert['name'],
-                            "Certificate": cert['certificate']
+                            "Gender": cert['gender'],
+                            "Organization": cert['organization'],
+                            "Completion Date": cert['completion_date'],
+                            "Certificate": cert['certificate'],
+                            "Duplicate Of": cert['duplicate_of']
                         })
                     
                     result_df = pd.DataFrame(result_rows)
@@ -642,6 +1072,10 @@ with tab3:
                     else:
                         st.success(f"Successfully generated {len(all_certificates)} certificates!")
                     
+                    linked_count = sum(1 for cert in all_certificates if cert['duplicate_of'])
+                    if linked_count:
+                        st.info(f"{linked_count} duplicate rows were linked to existing certificates instead of being generated.")
+                    
                     # Provide download buttons
                     col1, col2 = st.columns(2)
                     with col1: